@@ -1,24 +1,76 @@
 import os
+import re
 import sys
-from dotenv import load_dotenv
+import pathlib
+import functools
+from dotenv import dotenv_values, find_dotenv
+
+# .env files in load order; the first file to define a variable wins, and variables
+# already present in the environment are never overridden
+DOTENV_FILES = (
+    find_dotenv(),  # .env, searched for the same way load_dotenv() does by default
+    '.env.local',
+    '.env.development.local',
+    '.env.production.local',
+)
+
+
+def load_env_files():
+    """
+    Parse each existing .env file once and copy its values into os.environ without overriding.
+    """
+    for path in DOTENV_FILES:
+        if not path or not os.path.isfile(path):
+            continue
+        for key, value in dotenv_values(path).items():
+            if value is not None:
+                os.environ.setdefault(key, value)
+
 
 # Load environment variables from .env files
-load_dotenv()  # This will load .env by default
-load_dotenv('.env.local')  # Load .env.local if it exists
-load_dotenv('.env.development.local')  # Load .env.development.local if it exists
-load_dotenv('.env.production.local')  # Load .env.production.local if it exists
+load_env_files()
+
+# Only the keys we care about are pulled out of divi.conf, in one pass over the raw bytes
+_CONF_RE = re.compile(rb'^(rpcuser|rpcpassword|rpcport|rpcbind)[ \t]*=[ \t]*([^\r\n]*?)[ \t]*\r?$', re.M)
+_CONF_KEYS = {
+    b'rpcuser': 'rpc_user',
+    b'rpcpassword': 'rpc_password',
+    b'rpcport': 'rpc_port',
+    b'rpcbind': 'rpc_host',
+}
+
+
+# divi.conf location per platform, keyed by sys.platform prefix
+_PLATFORM_CONF_PATHS = {
+    'win': lambda: os.path.join(os.getenv('APPDATA'), 'DIVI', 'divi.conf'),
+    'darwin': lambda: os.path.join(os.path.expanduser("~"), 'Library', 'Application Support', 'DIVI', 'divi.conf'),
+    'linux': lambda: os.path.join(os.path.expanduser("~"), '.divi', 'divi.conf'),
+}
+
+# The platform can't change at runtime, so resolve the path once at import (None if unsupported)
+_platform_key = next((key for key in _PLATFORM_CONF_PATHS if sys.platform.startswith(key)), None)
+DIVI_CONF_PATH = _PLATFORM_CONF_PATHS[_platform_key]() if _platform_key else None
+
+
+@functools.lru_cache(maxsize=1)
+def _read_divi_conf(path, mtime):
+    """
+    Parse divi.conf once per (path, mtime). A changed file gets a new mtime and therefore a fresh parse.
+    Returns the values found, keyed by their name in the config dict.
+    """
+    data = pathlib.Path(path).read_bytes()
+    conf = {_CONF_KEYS[key]: value.decode() for key, value in _CONF_RE.findall(data)}
+    if 'rpc_port' in conf:
+        conf['rpc_port'] = int(conf['rpc_port'])
+    return conf
+
 
 def get_conf_path():
     """
     Determine the appropriate configuration file path based on the platform and read the rpcuser, rpcpassword, and rpcport.
     """
-    if sys.platform.startswith('win'):
-        path = os.path.join(os.getenv('APPDATA'), 'DIVI', 'divi.conf')
-    elif sys.platform == 'darwin':
-        path = os.path.join(os.path.expanduser("~"), 'Library', 'Application Support', 'DIVI', 'divi.conf')
-    elif sys.platform.startswith('linux'):
-        path = os.path.join(os.path.expanduser("~"), '.divi', 'divi.conf')
-    else:
+    path = DIVI_CONF_PATH
+    if path is None:
         raise OSError(f"Unsupported platform: {sys.platform}")
 
     config = {
@@ -26,38 +78,41 @@ def get_conf_path():
         'rpc_password': None,
         'rpc_port': None,
         'rpc_host': None,
+        'rpc_pool_size': None,
         'host': None,
-        'port': None
+        'port': None,
+        'workers': None,
+        'peers_cache_ttl': None,
+        'block_poll_interval': None,
+        'access_log_file': None
     }
 
-    # if os.getenv('IGNORE_DIVID_CONF', 'TRUE') == 'TRUE':
-
+    # Snapshot the environment once so the lookups below are plain dict reads
+    env = dict(os.environ)
 
-    if os.getenv('IGNORE_DIVID_CONF', 'FALSE') == 'FALSE':
-        if os.path.exists(path):
-            with open(path, 'r') as f:
-                for line in f:
-                    if "=" not in line:
-                        continue
-                    key, value = line.split("=", 1)
-                    value = value.strip()
+    if env.get('IGNORE_DIVID_CONF', 'FALSE') == 'FALSE':
+        # Stat the file directly instead of checking os.path.exists first; a missing
+        # or unreadable divi.conf just means we fall back to the environment.
+        try:
+            conf = _read_divi_conf(path, os.stat(path).st_mtime_ns)
+        except (FileNotFoundError, PermissionError):
+            conf = None
 
-                    if key == "rpcuser":
-                        config['rpc_user'] = value
-                    elif key == "rpcpassword":
-                        config['rpc_password'] = value
-                    elif key == "rpcport":
-                        config['rpc_port'] = int(value)
-                    elif key == "rpcbind":
-                        config['rpc_host'] = value
+        if conf is not None:
+            config.update(conf)
 
     # Fallback to environment variables
-    config['rpc_user'] = config['rpc_user'] or os.getenv('RPC_USER')
-    config['rpc_password'] = config['rpc_password'] or os.getenv('RPC_PASS')
-    config['rpc_port'] = config['rpc_port'] or int(os.getenv('RPC_PORT', 51473))  # Default to port 51473
-    config['rpc_host'] = config['rpc_host'] or os.getenv('RPC_HOST', '127.0.0.1')
-    config['host'] = config['host'] or os.getenv('HOST', '127.0.0.1')
-    config['port'] = config['port'] or int(os.getenv('PORT', 8000))
+    config['rpc_user'] = config['rpc_user'] or env.get('RPC_USER')
+    config['rpc_password'] = config['rpc_password'] or env.get('RPC_PASS')
+    config['rpc_port'] = config['rpc_port'] or int(env.get('RPC_PORT', 51473))  # Default to port 51473
+    config['rpc_host'] = config['rpc_host'] or env.get('RPC_HOST', '127.0.0.1')
+    config['rpc_pool_size'] = config['rpc_pool_size'] or int(env.get('RPC_POOL_SIZE', 100))  # Max connections to the node per worker
+    config['host'] = config['host'] or env.get('HOST', '127.0.0.1')
+    config['port'] = config['port'] or int(env.get('PORT', 8000))
+    config['workers'] = config['workers'] or int(env.get('WORKERS', os.cpu_count() or 1))  # Default to one worker per core
+    config['peers_cache_ttl'] = config['peers_cache_ttl'] or int(env.get('PEERS_CACHE_TTL', 300))  # Default to 5 minutes
+    config['block_poll_interval'] = config['block_poll_interval'] or float(env.get('BLOCK_POLL_INTERVAL', 3))  # 0 disables the watcher
+    config['access_log_file'] = config['access_log_file'] or env.get('ACCESS_LOG_FILE')  # Default to stdout
 
     if not config['rpc_user'] or not config['rpc_password']:
         raise ValueError("Missing rpcuser or rpcpassword in configuration file or RPC_USER or RPC_PASS environment variables.")
@@ -66,4 +121,6 @@ def get_conf_path():
 
 # Load RPC credentials
 config = get_conf_path()
-RPC_URL = f"http://{config['rpc_user']}:{config['rpc_password']}@{config['rpc_host']}:{config['rpc_port']}"
+# No credentials in the URL: RpcClient sends them as a BasicAuth header, and the URL ends up in
+# log lines and httpx exception messages
+RPC_URL = f"http://{config['rpc_host']}:{config['rpc_port']}"
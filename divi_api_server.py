@@ -1,26 +1,77 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
-from rpc_client import RpcClient
-from datetime import datetime, timezone, timedelta
-import requests
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial, wraps
+from collections import defaultdict
+from rpc_client import RpcClient, RpcError
+from rpc_helpers import utc_iso_now, handle_rpc_response, handle_raw_rpc_response, handle_rpc_error, json_bytes_response
+from cachetools import TLRUCache
+import asyncio
+import httpx
+import inspect
 import logging
+import orjson
+import queue
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from config import config
 
 logging.basicConfig(level = logging.ERROR)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) :
+    # Build the RPC client and its connection pool once the event loop is up (one per worker),
+    # so the first burst of requests doesn't race to initialise it
+    access_log_listener = start_access_log()
+    async with RpcClient() as rpc :
+        app.state.rpc = rpc
+        watcher = asyncio.create_task(block_watcher()) if BLOCK_POLL_INTERVAL > 0 else None
+        try :
+            yield
+        finally :
+            if watcher is not None :
+                watcher.cancel()
+            access_log_listener.stop()
+            for handler in access_log_listener.handlers :
+                handler.close()
+
 app = FastAPI(
     title = "Divi Blockchain API",
     description = "API for interacting with the Divi Blockchain via RPC calls",
-    version = "1.1.0"
+    version = "1.1.0",
+    default_response_class = ORJSONResponse,
+    lifespan = lifespan
 )
 
+def get_rpc() :
+    return app.state.rpc
+
 # Cache settings
-cache = {"data" : None, "timestamp" : None}
-CACHE_DURATION = timedelta(hours = 5)
+CACHE_DURATION = config['peers_cache_ttl']  # Seconds before /getpeers data is refreshed
+
+# RPC result cache shared by all endpoints. Entries are (ttl, response) pairs so each
+# endpoint can pick its own lifetime (see rpc_call_wrapper)
+RPC_CACHE_MAXSIZE = 4096
+_rpc_cache = TLRUCache(maxsize = RPC_CACHE_MAXSIZE, ttu = lambda key, entry, now : now + entry[0], timer = time.monotonic)
+
+# Bumped by invalidate_block_scoped(); a fetch that straddles a new block must not store its result
+_block_generation = [0]
+
+# Per-endpoint cache lifetimes, in seconds
+BLOCK_COUNT_TTL = 30
+INFO_TTL = 10
+CONNECTION_COUNT_TTL = 5
+MEMPOOL_TTL = 2
+BLOCK_HASH_TTL = 3600  # Dropped on every new block anyway, since a reorg can change the block at a height
+BLOCK_TTL = 3600  # Block contents are immutable, but verbose getblock carries confirmations/nextblockhash
+BLOCK_POLL_INTERVAL = config['block_poll_interval']  # Seconds between new-block checks, 0 disables
+
 
 
 @app.exception_handler(HTTPException)
@@ -34,7 +85,7 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException) :
         if isinstance(exc.detail, str)
         else exc.detail
     )
-    return JSONResponse(status_code = exc.status_code, content = content)
+    return ORJSONResponse(status_code = exc.status_code, content = content)
 
 @app.exception_handler(Exception)
 async def generic_500_handler(request: Request, exc: Exception) :
@@ -42,7 +93,7 @@ async def generic_500_handler(request: Request, exc: Exception) :
     logging.error(f"Internal server error: {exc}")
 
     # Return a funny custom message for the user
-    return JSONResponse(
+    return ORJSONResponse(
         status_code = 500,
         content = {
             "error" : 500,
@@ -65,90 +116,193 @@ app.add_middleware(
     allow_methods=["GET", "POST"],    # Restrict to necessary methods
     allow_headers=["Content-Type", "Authorization"],  # Specify only required headers
 )
-rpc = RpcClient()
+# Access log: handlers only enqueue records, a background listener thread does the writing
+access_log = logging.getLogger("access")
+access_log.setLevel(logging.INFO)
+access_log.propagate = False
+_access_log_queue = queue.SimpleQueue()
+access_log.addHandler(QueueHandler(_access_log_queue))
+
+def start_access_log() :
+    # Writes go to ACCESS_LOG_FILE when set, stdout otherwise; the listener thread is the only writer
+    if config['access_log_file'] :
+        handler = logging.FileHandler(config['access_log_file'])
+    else :
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("IP Address: %(message)s, Time: %(asctime)s", "%Y-%m-%d %H:%M:%S"))
+    listener = QueueListener(_access_log_queue, handler)
+    listener.start()
+    return listener
 
 # Middleware for logging IP addresses
 @app.middleware("http")
 async def log_requests(request: Request, call_next) :
-    ip = request.client.host
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"IP Address: {ip}, Time: {current_time}")
+    if access_log.isEnabledFor(logging.INFO) :
+        access_log.info("%s", request.client.host)
     response = await call_next(request)
     return response
 
 
-# RPC Response hander
-def handle_rpc_response(result):
-    # Check if the result itself is a dictionary with a "result" key
-    if isinstance(result, dict) and "result" in result:
-        # Unwrap the inner result if it has "result" key at the top level
-        result = result["result"]
-
-    # Return structured response
-    return {
-        "result": result,
-        "error": None,
-        "timestamp_utc": datetime.now(timezone.utc).isoformat()
-    }
+# Both return (block generation when the RPC started, response); see rpc_call_wrapper
+async def _fetch(callable, args) :
+    generation = _block_generation[0]
+    return generation, handle_rpc_response(await callable(*args))
+
+async def _fetch_raw(callable, args) :
+    generation = _block_generation[0]
+    return generation, handle_raw_rpc_response(await callable(*args, raw = True))
+
+# Runs coro_fn() once for all concurrent callers asking for the same key;
+# everyone awaits the same task instead of issuing their own RPC
+class SingleFlight :
+    def __init__(self) :
+        self.inflight = {}
+
+    async def do(self, key, coro_fn) :
+        task = self.inflight.get(key)
+        if task is None :
+            # The call runs in its own task rather than the first caller's, so cancelling any one
+            # caller (the first included) leaves it running for everyone else
+            task = asyncio.ensure_future(coro_fn())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done : self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) :
+        if self.inflight.get(key) is task :
+            del self.inflight[key]
+        # Mark a failure as retrieved: if every caller was cancelled, nobody else will
+        if not task.cancelled() :
+            task.exception()
+
+# RPCs currently in flight, keyed like the response cache (see rpc_call_wrapper)
+rpc_flights = SingleFlight()
+
+# Transport failures -> (status code, log label, client-facing detail). Details are fixed strings:
+# exception text can quote the request URL and must never reach the client
+# (HTTP error replies from the node are raised as RpcError instead, see rpc_call_wrapper)
+_ERR_MAP = {
+    httpx.TimeoutException: (504, "Timeout", "Request Timeout. Service took too long to respond. Try again later."),
+    # Refused connections, and kept-alive connections the node dropped (ReadError, RemoteProtocolError)
+    httpx.TransportError: (503, "TransportError", "Service Unavailable. Try again later."),
+}
+_ERR_TYPES = tuple(_ERR_MAP)
+
+# With raw=True the RPC method returns the node's reply bytes and the response is
+# pre-serialized JSON bytes (see handle_raw_rpc_response) instead of a dict
+async def rpc_call_wrapper(callable, *args, cache_ttl = None, raw = False) :
+    key = (callable.__qualname__, args, raw)
+
+    # Serve from the cache when the endpoint opted in with cache_ttl
+    if cache_ttl :
+        cached = _rpc_cache.get(key)
+        if cached is not None :
+            return cached[1]
 
-# RPC Error handler
-def handle_rpc_error(error_msg):
-    return {
-        "result": None,
-        "error": {
-            "message": error_msg
-        },
-        "timestamp": datetime.now(timezone.utc).isoformat()  # Add UTC timestamp
-    }
-
-def rpc_call_wrapper(callable, *args) :
     try :
-        result = callable(*args)
-        return handle_rpc_response(result)
-    except requests.exceptions.ConnectionError as e :
-        logging.error(f"ConnectionError occurred: {e}")
-        raise HTTPException(status_code = 503, detail = "Service Unavailable. Try again later.")
-    except requests.exceptions.Timeout as e :
-        logging.error(f"Timeout occurred: {e}")
-        raise HTTPException(status_code = 504,
-                            detail = "Request Timeout. Service took too long to respond. Try again later.")
-    except requests.exceptions.HTTPError as e :
-        logging.error(f"HTTPError occurred: {e}")
-        raise HTTPException(status_code = 401,
-                            detail = f"Oops! There was an HTTP error: {str(e)}. Check your request and try again.")
+        if raw :
+            generation, response = await rpc_flights.do(key, lambda : _fetch_raw(callable, args))
+        else :
+            generation, response = await rpc_flights.do(key, lambda : _fetch(callable, args))
+        # Skip the store if a new block arrived since the RPC started (not since this caller
+        # joined the flight): the result may predate it, and the purge that already ran
+        # wouldn't drop it again until the next block
+        if cache_ttl and generation == _block_generation[0] :
+            _rpc_cache[key] = (cache_ttl, response)
+        return response
+    except RpcError as e :
+        logging.error(f"RpcError occurred: {e}")
+        # Only a real auth failure against the node is reported as one; anything the node
+        # explained (bad address, unknown block, rejected tx) goes back to the client as a 400
+        if e.status_code in (401, 403) :
+            raise HTTPException(status_code = 401, detail = "The RPC node rejected this server's credentials.")
+        if e.message :
+            raise HTTPException(status_code = 400, detail = e.message)
+        raise HTTPException(status_code = 502, detail = "Bad response from the RPC node. Try again later.")
+    except _ERR_TYPES as e :
+        # Walk the MRO so subclasses (e.g. httpx.ConnectTimeout) land on their base's entry
+        status_code, label, detail = next(_ERR_MAP[cls] for cls in type(e).__mro__ if cls in _ERR_MAP)
+        logging.error(f"{label} occurred: {e}")
+        raise HTTPException(status_code = status_code, detail = detail)
     except Exception as e :
         # Log the actual exception to help with debugging
         logging.error(f"General Exception occurred: {e}")
         raise HTTPException(status_code = 500,
                             detail = "Oops! Looks like something broke. Either the universe just exploded, or you used the wrong API function. Try again, newb!")
 
-# Convert string "true" or "false" to bool manually
-def str_to_bool(value: str) -> bool :
-    return value.lower() == 'true'
+# Encode a list response a slice at a time instead of serializing the whole payload into one buffer
+STREAM_CHUNK_ITEMS = 500
+
+async def _stream_json_list(response) :
+    items = response["result"]
+    yield b'{"result":['
+    for start in range(0, len(items), STREAM_CHUNK_ITEMS) :
+        chunk = b",".join(map(orjson.dumps, items[start :start + STREAM_CHUNK_ITEMS]))
+        yield chunk if start == 0 else b"," + chunk
+    yield b'],"error":null,"timestamp_utc":' + orjson.dumps(response["timestamp_utc"]) + b"}"
+
+def _stream_list_response(response) :
+    if isinstance(response["result"], list) :
+        return StreamingResponse(_stream_json_list(response), media_type = "application/json")
+    return response
+
+# Decorator for routes that are a straight passthrough to a single RpcClient method
+# (given unbound, e.g. RpcClient.get_info, and looked up on the live client per request).
+# The decorated function only declares the route's parameters; they are forwarded
+# to the RPC positionally, in declaration order. With stream=True, list results are
+# sent as a chunked JSON body; with raw=True the node's reply is forwarded without
+# being decoded (the method must accept raw=True).
+def rpc_endpoint(method, cache_ttl = None, stream = False, raw = False) :
+    name = method.__name__
+
+    def decorator(fn) :
+        names = tuple(inspect.signature(fn).parameters)
+        finish = json_bytes_response if raw else _stream_list_response if stream else None
+
+        # Everything that can be decided up front is, so each request runs the smallest body possible
+        if not names :
+            @wraps(fn)
+            async def wrapper() :
+                response = await rpc_call_wrapper(getattr(get_rpc(), name), cache_ttl = cache_ttl, raw = raw)
+                return finish(response) if finish else response
+        else :
+            @wraps(fn)
+            async def wrapper(*args, **kwargs) :
+                # FastAPI passes route parameters as keywords
+                args += tuple(map(kwargs.__getitem__, names[len(args):]))
+                response = await rpc_call_wrapper(getattr(get_rpc(), name), *args, cache_ttl = cache_ttl, raw = raw)
+                return finish(response) if finish else response
 
+        return wrapper
+    return decorator
 
-# Convert string "true" or "false" to int
-def str_to_int_bool(value: str) -> int :
-    return 1 if str_to_bool(value) else 0
+# Ping server. The body never changes, so it is serialized once; the Response itself is built per
+# request because middleware (CORS) appends headers to it in place.
+_PONG_BODY = b'{"message":"pong"}'
 
-# Ping server
 @app.get("/ping", summary = "Ping the server", description = "Returns a 'pong' message to check server connectivity.")
 async def ping() :
-    return rpc.ping()
+    return json_bytes_response(_PONG_BODY)
 
 
 # Current block count
 @app.get("/blockcount", summary = "Get Block Count",
          description = "Fetches the current block count of the Divi blockchain.")
+@rpc_endpoint(RpcClient.get_block_count, cache_ttl = BLOCK_COUNT_TTL)
 async def get_block_count() :
-    return rpc_call_wrapper(rpc.get_block_count)
+    ...
+
+# Path parameter validators, compiled once. ASCII-only on purpose: str.isdigit() also accepts
+# characters like "²" that int() then rejects
+_is_block_number = re.compile(r'[0-9]{1,10}').fullmatch
+_is_block_hash = re.compile(r'[0-9a-fA-F]{64}').fullmatch
 
 # Information about a specific block's hash by block number
 @app.get("/blockhash/{block}", summary = "Get Block Hash",
          description = "Fetches the block hash for a specific block number.")
 async def get_block_hash(block: str) :
     # Validate the block number format to ensure it's a non-negative integer
-    if not block.isdigit() :
+    if not _is_block_number(block) :
         raise HTTPException(
             status_code = 400,
             detail = "Invalid block number format. Block number should be a non-negative integer."
@@ -159,7 +313,7 @@ async def get_block_hash(block: str) :
 
     # Proceed with the RPC call
     try :
-        return rpc_call_wrapper(rpc.get_block_hash, block_num)
+        return await rpc_call_wrapper(get_rpc().get_block_hash, block_num, cache_ttl = BLOCK_HASH_TTL)
     except Exception as e :
         logging.error(f"Error while fetching block hash: {e}")
         raise HTTPException(
@@ -172,7 +326,7 @@ async def get_block_hash(block: str) :
          description = "Fetches the block information for a given block hash.")
 async def get_block(hash: str) :
     # Validate the hash format
-    if not (len(hash) == 64 and all(c in '0123456789abcdefABCDEF' for c in hash)) :
+    if not _is_block_hash(hash) :
         raise HTTPException(
             status_code = 400,
             detail = "Invalid block hash format. Expected a 64-character hexadecimal string."
@@ -180,7 +334,7 @@ async def get_block(hash: str) :
 
     # If the hash is valid, proceed with the RPC call
     try :
-        return rpc_call_wrapper(rpc.get_block, hash)
+        return json_bytes_response(await rpc_call_wrapper(get_rpc().get_block, hash, cache_ttl = BLOCK_TTL, raw = True))
     except Exception as e :
         logging.error(f"Error while fetching block: {e}")
         # Customize error message for non-existent block
@@ -191,131 +345,222 @@ async def get_block(hash: str) :
 
 # Current General Blockchain Stats
 @app.get("/info")
+@rpc_endpoint(RpcClient.get_info, cache_ttl = INFO_TTL)
 async def get_info() :
-    return rpc_call_wrapper(rpc.get_info)
+    ...
 
 # Total number of connected peers
 @app.get("/connectioncount", summary = "Get Total Number of Connected Peers",
          description = "Returns the current number of peers connected to the node. This includes both incoming and outgoing connections, providing an overview of the network's health.")
+@rpc_endpoint(RpcClient.get_connection_count, cache_ttl = CONNECTION_COUNT_TTL)
 async def get_connection_count() :
-    return rpc_call_wrapper(rpc.get_connection_count)
+    ...
 
 # Filtered peers list
-def split_ip_port(address) :
-    # For IPv6 with brackets, remove them and split on `]:`
-    if address.startswith('[') :
-        ip = address[1 :].split(']:')[0]
-        port = address.split(']:')[-1]
-    else :
-        # For IPv4, just split on `:`
-        ip, port = address.split(':')
-    return ip, port
+MIN_PEER_VERSION = (3, 0, 0, 0)
+_SUBVER_RE = re.compile(r'DIVI Core: ?(\d+)\.(\d+)\.(\d+)(?:\.(\d+))?')
+
+@lru_cache(maxsize = 256)
+def peer_version(subver) :
+    # "DIVI Core: 3.0.1.0" -> (3, 0, 1, 0); None if the subversion isn't a DIVI Core one.
+    # Comparing tuples rather than strings keeps e.g. 10.0.0.0 above 3.0.0.0
+    match = _SUBVER_RE.search(subver)
+    if not match :
+        return None
+    return tuple(int(part or 0) for part in match.groups())
+
+# Matches both "1.2.3.4:51472" and "[2001:db8::1]:51472": group 1 is a bracketed IPv6 host,
+# group 2 any other host, group 3 the port
+_ADDR_RE = re.compile(r'^(?:\[([^\]]+)\]|([^:]+)):(\d+)$')
+
+# Single-value cache that keeps serving its last value once it goes stale while one background
+# task refreshes it; callers only wait on the upstream when there is no value at all yet
+class StaleWhileRevalidateCache :
+    def __init__(self, ttl, fetch, soft_margin = 0.2) :
+        self.ttl = ttl
+        self.fetch = fetch
+        self.soft_margin = ttl * soft_margin  # Start refreshing this many seconds before expiry
+        self.data = None
+        self.expiry = 0.0
+        self.generation = 0  # Bumped by invalidate()
+        self.refreshing = False
+        self.lock = asyncio.Lock()
+        self._task = None
+
+    def invalidate(self) :
+        # Mark the data as expired; the next get() still returns it but kicks off a refresh
+        self.generation += 1
+        self.expiry = 0.0
+
+    async def get(self) :
+        if self.data is not None :
+            if not self.refreshing and time.monotonic() > self.expiry - self.soft_margin :
+                self.refreshing = True
+                self._task = asyncio.create_task(self._background_refresh())
+            return self.data
+
+        # Cold cache: only one caller fetches, the rest wait for it on the lock
+        async with self.lock :
+            if self.data is None :
+                await self._refresh()
+        return self.data
+
+    async def _refresh(self) :
+        generation = self.generation
+        data = await self.fetch()
+        self.data = data
+        # A refresh that was already running when invalidate() hit keeps the data expired
+        if generation == self.generation :
+            self.expiry = time.monotonic() + self.ttl
+
+    async def _background_refresh(self) :
+        try :
+            async with self.lock :
+                await self._refresh()
+        except Exception as e :
+            # Keep serving the stale data; the next request past the margin tries again
+            logging.error(f"Background cache refresh failed: {e}")
+        finally :
+            self.refreshing = False
+
+async def fetch_peers(include_ipv6) :
+    # Get current block count and peer information in a single batched round-trip
+    block_count, peer_info = await get_rpc().call_many([("getblockcount", []), ("getpeerinfo", [])])
+    if block_count is None :
+        raise HTTPException(status_code = 500, detail = "Unable to retrieve block count.")
+
+    if not peer_info :
+        raise HTTPException(status_code = 500, detail = "Unable to retrieve peer information.")
+
+    # Filter peers based on criteria
+    min_height = block_count - 1000
+    filtered_peers = defaultdict(list)
+    for peer in peer_info :
+        addr = peer.get("addr", "")
+
+        # Exclude IPv6 addresses if include_ipv6 is False
+        if not include_ipv6 and addr[:1] == '[' :
+            continue
+
+        # Check subversion and block height criteria
+        subver = peer.get("subver", "")
+        version = peer_version(subver)
+        if version is None or version < MIN_PEER_VERSION or peer.get("startingheight", 0) < min_height :
+            continue
+
+        # Extract the IP and port from the address, skipping anything malformed
+        match = _ADDR_RE.match(addr)
+        if not match :
+            continue
+        filtered_peers[subver].append({"ip" : match.group(1) or match.group(2), "port" : match.group(3)})
+
+    # Structure the result
+    return {
+        "result" : [{"core" : ver, "peers" : peers} for ver, peers in filtered_peers.items()],
+        "error" : None,
+        "id" : 1,
+        "timestamp_utc" : utc_iso_now()
+    }
+
+# One cache per include_ipv6 value, since the filtered lists differ
+peers_cache = {
+    include_ipv6 : StaleWhileRevalidateCache(CACHE_DURATION, partial(fetch_peers, include_ipv6))
+    for include_ipv6 in (False, True)
+}
 
 @app.get("/getpeers", summary = "Get Filtered Peer List",
          description = "Returns a list of peers filtered by DIVI Core version and block height.")
 async def get_peers(include_ipv6: bool = False) :
-    global cache
-
-    # Check cache
-    now = datetime.now(timezone.utc)
-    if cache["data"] and cache["timestamp"] and now - cache["timestamp"] < CACHE_DURATION :
-        return cache["data"]
-
     try :
-        # Get current block count
-        block_count = rpc.get_block_count()
-        if block_count is None :
-            raise HTTPException(status_code = 500, detail = "Unable to retrieve block count.")
-
-        # Get peer information
-        peer_info = rpc.get_peer_info()
-        if not peer_info :
-            raise HTTPException(status_code = 500, detail = "Unable to retrieve peer information.")
-
-        # Filter peers based on criteria
-        filtered_peers = {}
-        for peer in peer_info :
-            subver = peer.get("subver", "")
-            starting_height = peer.get("startingheight", 0)
-            addr = peer.get("addr", "")
-
-            # Exclude IPv6 addresses if include_ipv6 is False
-            if not include_ipv6 and addr.startswith('[') :
-                continue
-
-            # Extract the IP and port from the address
-            ip_address, port = split_ip_port(addr)
-
-            # Check subversion and block height criteria
-            if subver >= "DIVI Core: 3.0.0.0" and starting_height >= block_count - 1000 :
-                if subver not in filtered_peers :
-                    filtered_peers[subver] = []
-                filtered_peers[subver].append({"ip" : ip_address, "port" : port})
-
-        # Structure the result
-        result = {
-            "result" : [{"core" : ver, "peers" : peers} for ver, peers in filtered_peers.items()],
-            "error" : None,
-            "id" : 1,
-            "timestamp_utc" : now.isoformat()
-        }
-
-        # Update cache
-        cache["data"] = result
-        cache["timestamp"] = now
-
-        return result
-
+        return await peers_cache[include_ipv6].get()
     except Exception as e :
-        return {"error" : str(e), "timestamp" : now.isoformat()}
+        return {"error" : str(e), "timestamp" : utc_iso_now()}
+
+
+# Cache invalidation on new blocks: everything below depends on the chain tip, so it is
+# dropped as soon as the block count moves instead of waiting out its TTL
+BLOCK_SCOPED_METHODS = frozenset(
+    method.__qualname__ for method in (
+        RpcClient.get_block_count,
+        RpcClient.get_block_hash,
+        RpcClient.get_block,
+        RpcClient.get_info,
+        RpcClient.get_raw_mempool,
+        RpcClient.get_mempool_info,
+    )
+)
+
+def invalidate_block_scoped() :
+    _block_generation[0] += 1
+    for key in [key for key in _rpc_cache if key[0] in BLOCK_SCOPED_METHODS] :
+        _rpc_cache.pop(key, None)
+    for cache in peers_cache.values() :
+        cache.invalidate()
+
+async def block_watcher() :
+    last_block_count = None
+    while True :
+        try :
+            block_count = await get_rpc().get_block_count()
+        except Exception as e :
+            logging.error(f"Block watcher failed to fetch block count: {e}")
+        else :
+            # The first reading counts as a change too: whatever was cached before it (e.g. while
+            # the node was unreachable) may already be behind
+            if block_count != last_block_count :
+                invalidate_block_scoped()
+                last_block_count = block_count
+        await asyncio.sleep(BLOCK_POLL_INTERVAL)
 
 
 # Check transaction details
 @app.get("/tx/{txid}", summary = "Get Transaction",
          description = "Fetches details about a specific transaction based on its txid.")
+@rpc_endpoint(RpcClient.get_raw_transaction, raw = True)
 async def get_transaction(txid: str) :
-    return rpc_call_wrapper(rpc.get_raw_transaction, txid, True)
+    ...
 
 
 # Get address or vault owner key balance current and total received
 @app.get("/getaddressbalance/{address}/{isVault}",
          summary="Get Address Balance",
          description="Fetches the current balance and total received amount for a specified address or vault owner key. Use the 'isVault' boolean to lookup a vault owner key.")
+@rpc_endpoint(RpcClient.get_address_balance)
 async def get_address_balance(address: str, isVault: bool = False):
-
-    return rpc_call_wrapper(rpc.get_address_balance, address, isVault)
+    ...
 
 # Get address or vault owner key deltas (transaction history)
 @app.get("/getaddressdeltas/{address}/{isVault}",
          summary = "Get Address Transaction History (Deltas)",
          description = "Returns the list of transaction deltas (history of transactions) for a specified address or vault owner key. This will include both spent and unspent transaction history. Use the 'isVault' boolean to lookup a vault owner key.")
+@rpc_endpoint(RpcClient.get_address_deltas, stream = True)
 async def get_address_deltas(address: str, isVault: bool = False):
-
-    return rpc_call_wrapper(rpc.get_address_deltas, address, isVault)
+    ...
 
 # Get address transaction IDs (unspent transactions)
 @app.get("/getaddresstxids/{address}/{isVault}",
          summary = "Get Address or Vault Owner Key Transaction IDs",
          description = "Fetches the list of transaction IDs associated with the specified address or vault owner key. This can include all transaction IDs, use the 'isVault' boolean to lookup a vault owner key.")
+@rpc_endpoint(RpcClient.get_address_txids)
 async def get_address_txids(address: str, isVault: bool = False):
-
-    return rpc_call_wrapper(rpc.get_address_txids, address, isVault)
+    ...
 
 # Get address UTXOs for an address or vault owner key
 @app.get("/getaddressutxos/{address}/{isVault}",
          summary = "Get Address or Vault Owner Key UTXOs",
          description = "Fetches the list of Unspent Transaction Outputs (UTXOs) associated with the specified address or vault owner key. Use the 'isVault' boolean to lookup a vault owner key.")
+@rpc_endpoint(RpcClient.get_address_utxos, stream = True)
 async def get_address_utxos(address: str, isVault: bool = False):
-
-    return rpc_call_wrapper(rpc.get_address_utxos, address, isVault)
+    ...
 
 
 # Decode raw transaction
 @app.get("/decode-raw-tx/{hex}",
          summary = "Decode Raw Transaction",
          description = "Decodes a raw transaction hex string and returns detailed information about the transaction, including inputs, outputs, and other metadata.")
+@rpc_endpoint(RpcClient.decode_raw_transaction, raw = True)
 async def decode_raw_transaction(hex: str) :
-    return rpc_call_wrapper(rpc.decode_raw_transaction, hex)
+    ...
 
 
 # Send raw transaction
@@ -326,13 +571,13 @@ class SendRawTransactionRequest(BaseModel):
           summary="Send Raw Transaction",
           description="Broadcasts a raw transaction to the blockchain network.")
 
-async def send_raw_transaction(hexstring: str):
+async def send_raw_transaction(hexstring: str, allowhighfees: bool = False):
     # Validate that hexstring is a non-empty string
     if not hexstring:
         raise HTTPException(status_code=400, detail="Invalid hexstring provided")
 
     # Call the RPC client with the hexstring
-    return rpc_call_wrapper(rpc.send_raw_transaction, hexstring)
+    return await rpc_call_wrapper(get_rpc().send_raw_transaction, hexstring, allowhighfees)
 
 
 
@@ -340,16 +585,18 @@ async def send_raw_transaction(hexstring: str):
 @app.get("/getrawmempool",
          summary = "Get Current Mempool Transactions",
          description = "Fetches the list of transaction IDs currently in the node's memory pool (mempool). These are unconfirmed transactions that are awaiting inclusion in the next block.")
+@rpc_endpoint(RpcClient.get_raw_mempool, cache_ttl = MEMPOOL_TTL, raw = True)
 async def get_raw_mempool() :
-    return rpc_call_wrapper(rpc.get_raw_mempool)
+    ...
 
 
 # Get mempool info
 @app.get("/getmempoolinfo",
          summary = "Get Mempool Info",
          description = "Returns detailed information about the current state of the memory pool (mempool). This includes size, memory usage, and other statistics regarding pending transactions.")
+@rpc_endpoint(RpcClient.get_mempool_info, cache_ttl = MEMPOOL_TTL)
 async def get_mempool_info() :
-    return rpc_call_wrapper(rpc.get_mempool_info)
+    ...
 
 
 # Get lottery winners (if no block height is provided, fetch the latest)
@@ -367,10 +614,10 @@ async def get_lottery(blockheight: Optional[int] = None) :
     try :
         if blockheight is not None :
             # Blockheight provided, fetch for the specific block
-            result = rpc.get_lottery_block_winners(blockheight)
+            result = await get_rpc().get_lottery_block_winners(blockheight)
         else :
             # No blockheight provided, fetch latest lottery winners
-            result = rpc.get_lottery_block_winners()
+            result = await get_rpc().get_lottery_block_winners()
         return handle_rpc_response(result)
     except Exception as e :
         return handle_rpc_error(str(e))
@@ -379,4 +626,14 @@ async def get_lottery(blockheight: Optional[int] = None) :
 if __name__ == "__main__" :
     import uvicorn
 
-    uvicorn.run(app, host = config['host'], port = config['port'])
\ No newline at end of file
+    # uvloop has no Windows build; fall back to the stock asyncio loop there
+    uvicorn.run(
+        "divi_api_server:app",
+        host = config['host'],
+        port = config['port'],
+        workers = config['workers'],
+        loop = "asyncio" if sys.platform.startswith('win') else "uvloop",
+        http = "httptools",
+        log_level = "warning",
+        access_log = False,  # log_requests already records client IPs
+    )
@@ -0,0 +1,19 @@
+# Gunicorn settings for running divi_api_server under uvicorn workers:
+#   gunicorn -c gunicorn_conf.py divi_api_server:app
+# Each worker runs its own event loop and opens its own RpcClient pool in the app lifespan,
+# so RPC_POOL_SIZE is per worker.
+import os
+import multiprocessing
+# `config` is itself a gunicorn setting name, so import ours under another one
+from config import config as _config
+
+bind = f"{_config['host']}:{_config['port']}"
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+# I/O-bound proxying: 2 * cores + 1 unless WORKERS is set explicitly
+workers = int(os.getenv('WORKERS', multiprocessing.cpu_count() * 2 + 1))
+keepalive = 30
+
+# log_requests already records client IPs
+accesslog = None
+loglevel = 'warning'
@@ -1,103 +1,210 @@
-import requests
-from requests.auth import HTTPBasicAuth
+import asyncio
+import httpx
+import itertools
 import logging
+import orjson
 from config import RPC_URL, config
 
 
+class RpcError(Exception):
+    """
+    The node answered, but with an error. `status_code` is the node's HTTP status (None for an
+    entry of a batch reply) and `message` is its JSON-RPC error message, if it sent one.
+    """
+    def __init__(self, method, status_code=None, message=None):
+        super().__init__(f"RPC error in {method}: HTTP {status_code}, {message}")
+        self.method = method
+        self.status_code = status_code
+        self.message = message
+
+
 class RpcClient:
+    # Larger JSON-RPC batches are split up; very big batches hold the node's RPC thread for too long
+    MAX_BATCH_SIZE = 50
+
     def __init__(self):
         self.rpc_url = RPC_URL
-        self.auth = HTTPBasicAuth(config['rpc_user'], config['rpc_password'])
-
-    def call(self, method, params=None):
-        params = params or []
+        self.auth = httpx.BasicAuth(config['rpc_user'], config['rpc_password'])
+        # One pooled client per process so RPCs reuse kept-alive connections to the node.
+        # Auth and headers are set once here rather than on every request.
+        self.client = httpx.AsyncClient(
+            auth=self.auth,
+            headers={'Content-Type': 'application/json'},
+            timeout=httpx.Timeout(10, connect=3),
+            limits=httpx.Limits(
+                max_connections=config['rpc_pool_size'],
+                max_keepalive_connections=max(1, config['rpc_pool_size'] // 2),
+            ),
+        )
+        # Request ids only need to be unique among a client's in-flight calls
+        self._ids = itertools.count(1)
+
+    async def __aenter__(self):
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.__aexit__(*exc_info)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def call(self, method, params=None):
+        return orjson.loads(await self.call_raw(method, params))
+
+    async def call_raw(self, method, params=None):
+        """
+        Same as call(), but returns the node's reply as undecoded JSON bytes.
+        """
         payload = {
             "jsonrpc": "2.0",
             "method": method,
-            "params": params,
-            "id": 1,
+            "params": params or [],
+            "id": next(self._ids),
         }
-        headers = {'Content-Type': 'application/json'}
 
-        # Add logging to debug the issue
-        logging.info(f"Making RPC call to {self.rpc_url} with method: {method} and params: {params}")
-        logging.info(f"Sending RPC request to {self.rpc_url}:")
-        logging.info(f"Method: {method}, Params: {params}")
-        logging.info(f"Raw Payload: {payload}")
+        # %-style args are only formatted when INFO is enabled (the server runs at ERROR by default)
+        logging.info("Sending RPC request to %s: %s", self.rpc_url, payload)
 
         try:
-            response = requests.post(self.rpc_url, headers=headers, json=payload, auth=self.auth)
-            response.raise_for_status()
-            logging.info(f"Response received: {response.status_code}, {response.text}")
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            response = await self.client.post(self.rpc_url, content=orjson.dumps(payload))
+        except httpx.HTTPError as e:
+            # Re-raise as-is so rpc_call_wrapper can map it to the right status code
             logging.error(f"Error occurred: {e}")
-            raise Exception(f"Error occurred: {e}")
+            raise
+
+        self._check_status(method, response)
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("Response received: %s, %s", response.status_code, response.text)
+        return response.content
+
+    async def call_many(self, calls):
+        """
+        Run several RPCs and return their results in call order. `calls` is a list of (method, params) pairs.
+        They are sent as JSON-RPC batch requests of up to MAX_BATCH_SIZE entries each, so N calls
+        cost one round-trip instead of N. A single call skips the batch format.
+        """
+        calls = list(calls)
+        if len(calls) == 1:
+            method, params = calls[0]
+            return [self._unwrap(method, await self.call(method, params))]
+
+        chunks = [calls[i:i + self.MAX_BATCH_SIZE] for i in range(0, len(calls), self.MAX_BATCH_SIZE)]
+        results = await asyncio.gather(*(self._post_batch(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+
+    async def _post_batch(self, calls):
+        payload = [
+            {"jsonrpc": "2.0", "method": method, "params": params or [], "id": i}
+            for i, (method, params) in enumerate(calls)
+        ]
+
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("Sending RPC batch to %s: %s", self.rpc_url, [method for method, _ in calls])
+
+        try:
+            response = await self.client.post(self.rpc_url, content=orjson.dumps(payload))
+        except httpx.HTTPError as e:
+            logging.error(f"Error occurred: {e}")
+            raise
+
+        self._check_status("batch", response)
+
+        # The node is free to answer batch entries in any order, so sort them back by id
+        replies = {reply.get('id'): reply for reply in orjson.loads(response.content)}
+        return [self._unwrap(method, replies.get(i)) for i, (method, _) in enumerate(calls)]
+
+    @staticmethod
+    def _error_message(error):
+        # JSON-RPC errors are {"code": ..., "message": ...}; be lenient about anything else
+        if isinstance(error, dict):
+            error = error.get('message')
+        return str(error) if error else None
+
+    def _check_status(self, method, response):
+        # Bitcoin-derived nodes report RPC errors (bad address, unknown block, rejected tx) as
+        # HTTP 500 with a JSON-RPC error body, and bad credentials as a bare 401/403
+        if not response.is_error:
+            return
+        try:
+            message = self._error_message(orjson.loads(response.content).get('error'))
+        except (orjson.JSONDecodeError, AttributeError):
+            message = None
+        logging.error("RPC %s failed: HTTP %s, %s", method, response.status_code, message)
+        raise RpcError(method, response.status_code, message)
+
+    @classmethod
+    def _unwrap(cls, method, reply):
+        if reply is None:
+            raise RpcError(method)
+        if reply.get('error'):
+            raise RpcError(method, message=cls._error_message(reply['error']))
+        return reply.get('result')
 
     # Address-related RPCs
-    def get_address_balance(self, address, is_vault=False):
-        return self.call('getaddressbalance', [{"addresses": [address]}, is_vault])
+    async def get_address_balance(self, address, is_vault=False):
+        return await self.call('getaddressbalance', [{"addresses": [address]}, is_vault])
 
-    def get_address_deltas(self, address, is_vault=False):
-        return self.call('getaddressdeltas', [{"addresses": [address]}, is_vault])
+    async def get_address_deltas(self, address, is_vault=False):
+        return await self.call('getaddressdeltas', [{"addresses": [address]}, is_vault])
 
-    def get_address_txids(self, address, is_vault=False):
-        return self.call('getaddresstxids', [{"addresses": [address]}, is_vault])
+    async def get_address_txids(self, address, is_vault=False):
+        return await self.call('getaddresstxids', [{"addresses": [address]}, is_vault])
 
-    def get_address_utxos(self, address, is_vault=False):
-        return self.call('getaddressutxos', [{"addresses": [address]}, is_vault])
+    async def get_address_utxos(self, address, is_vault=False):
+        return await self.call('getaddressutxos', [{"addresses": [address]}, is_vault])
 
     # Block-related RPCs
-    def get_block_count(self):
-        response = self.call('getblockcount')
+    async def get_block_count(self):
+        response = await self.call('getblockcount')
         return response.get('result')
 
-    def get_block(self, block_hash, verbosity=True):
-        return self.call('getblock', [block_hash, verbosity])
+    async def get_block(self, block_hash, verbosity=True, raw=False):
+        return await (self.call_raw if raw else self.call)('getblock', [block_hash, verbosity])
 
-    def get_block_hash(self, block_number):
-        return self.call('getblockhash', [block_number])
+    async def get_block_hash(self, block_number):
+        return await self.call('getblockhash', [block_number])
 
     # Transaction-related RPCs
-    def get_raw_transaction(self, txid, verbose=True):
+    async def get_raw_transaction(self, txid, verbose=True, raw=False):
         """
         Fetch the raw transaction for the given txid.
         - verbose=True translates to 1 (for RPC call)
         - verbose=False translates to 0
         """
         verbose_value = 1 if verbose else 0  # Convert True to 1, False to 0
-        return self.call('getrawtransaction', [txid, verbose_value])
+        return await (self.call_raw if raw else self.call)('getrawtransaction', [txid, verbose_value])
 
-    def send_raw_transaction(self, hexstring) :
-        return self.call('sendrawtransaction', [hexstring])
+    async def send_raw_transaction(self, hexstring, allow_high_fees=False) :
+        return await self.call('sendrawtransaction', [hexstring, allow_high_fees])
 
-    def decode_raw_transaction(self, hexstring):
-        return self.call('decoderawtransaction', [hexstring])
+    async def decode_raw_transaction(self, hexstring, raw=False):
+        return await (self.call_raw if raw else self.call)('decoderawtransaction', [hexstring])
 
     # Network-related RPCs
-    def get_connection_count(self):
-        return self.call('getconnectioncount')
+    async def get_connection_count(self):
+        return await self.call('getconnectioncount')
 
     # Fetch the peer information
-    def get_peer_info(self):
-        response = self.call('getpeerinfo')
+    async def get_peer_info(self):
+        response = await self.call('getpeerinfo')
         return response.get('result', [])
 
     # Info-related RPCs
-    def get_info(self):
-        return self.call('getinfo')
+    async def get_info(self):
+        return await self.call('getinfo')
 
     # Get current mempool transactions
-    def get_raw_mempool(self):
-        return self.call('getrawmempool')
+    async def get_raw_mempool(self, raw=False):
+        return await (self.call_raw if raw else self.call)('getrawmempool')
 
     # Get mempool info
-    def get_mempool_info(self):
-        return self.call('getmempoolinfo')
+    async def get_mempool_info(self):
+        return await self.call('getmempoolinfo')
 
     # Lottery-related RPCs
-    def get_lottery_block_winners(self, block_height=None):
-        return self.call('getlotteryblockwinners', [block_height] if block_height else [])
+    async def get_lottery_block_winners(self, block_height=None):
+        return await self.call('getlotteryblockwinners', [block_height] if block_height else [])
 
     def ping(self):
         return {"message": "pong"}
@@ -0,0 +1,64 @@
+from fastapi.responses import Response
+from datetime import datetime, timezone
+import orjson
+import re
+import time
+
+# UTC timestamp shared by every response issued within the same second
+_ts_cache = [0, ""]
+
+def utc_iso_now() :
+    now = int(time.time())
+    if now != _ts_cache[0] :
+        _ts_cache[0] = now
+        _ts_cache[1] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    return _ts_cache[1]
+
+# RPC Response hander
+def handle_rpc_response(result):
+    # A JSON-RPC envelope ({"result", "error", "id"}) is reshaped in place rather than
+    # copied; it was freshly decoded for this call and nothing else holds on to it
+    if type(result) is dict and "result" in result:
+        result.pop("id", None)
+        result["error"] = None
+        result["timestamp_utc"] = utc_iso_now()
+        return result
+
+    # Return structured response
+    return {
+        "result": result,
+        "error": None,
+        "timestamp_utc": utc_iso_now()
+    }
+
+# The node writes its replies as compact {"result":...,"error":null,"id":N}. When a reply has
+# exactly that shape, the result bytes are spliced into our envelope without being decoded
+_RAW_RESULT_PREFIX = b'{"result":'
+_RAW_RESULT_TAIL = re.compile(rb',"error":null,"id":\d+\}\s*')
+
+def handle_raw_rpc_response(body) :
+    if body.startswith(_RAW_RESULT_PREFIX) :
+        end = body.rfind(b',"error":null,"id":')
+        if end != -1 and _RAW_RESULT_TAIL.fullmatch(body, end) :
+            return b"".join((
+                body[:end],
+                b',"error":null,"timestamp_utc":"',
+                utc_iso_now().encode(),
+                b'"}',
+            ))
+
+    # Any other layout: decode and build the response the normal way
+    return orjson.dumps(handle_rpc_response(orjson.loads(body)))
+
+def json_bytes_response(body) :
+    return Response(content = body, media_type = "application/json")
+
+# RPC Error handler
+def handle_rpc_error(error_msg):
+    return {
+        "result": None,
+        "error": {
+            "message": error_msg
+        },
+        "timestamp": utc_iso_now()  # Add UTC timestamp
+    }